@@ -1,12 +1,16 @@
 import inspect
+import os
 import sys
+from collections import namedtuple
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 from .utils.common import (_generate_default_to_ignore_dirs, _get_path_as_str,
                            get_module_path)
 
 _MODULE = 'pigar.parser.Module'
+# stands in for pigar's Module, only the name is used
+_KnownModule = namedtuple('_KnownModule', ['name'])
 
 
 def _get_code_path(module_name: str, path: str) -> List[str]:
@@ -43,6 +47,10 @@ def get_name_to_module_path_map(imported_modules: List[_MODULE],
                                 to_ignore_paths: List[str]) -> Dict[str, str]:
 
     name_to_module_path = dict()
+    root_path = Path(root_path)
+    # with a trailing separator, so that only the contents are matched
+    ignore_prefixes = tuple(
+        os.path.join(os.path.realpath(path), '') for path in to_ignore_paths)
     for module in imported_modules:
         name = module.name
         sys_module_obj = sys.modules.get(name, None)
@@ -50,25 +58,28 @@ def get_name_to_module_path_map(imported_modules: List[_MODULE],
         if inspect.ismodule(sys_module_obj) and getattr(
                 sys_module_obj, '__file__', None):
 
-            if Path(root_path) in Path(get_module_path(
-                    sys_module_obj)).parents and _is_not_in_ignore_paths(
-                        sys_module_obj, to_ignore_paths):
-                name_to_module_path[module.name] = get_module_path(
-                    sys_module_obj)
+            module_path = get_module_path(sys_module_obj)
+            if root_path in Path(module_path).parents and \
+                    _is_not_in_ignore_paths(module_path, ignore_prefixes):
+                name_to_module_path[module.name] = module_path
     return name_to_module_path
 
 
-def _is_not_in_ignore_paths(module, to_ignore_paths):
-    return not any([
-        Path(to_ignore_path) in Path(get_module_path(module)).parents
-        for to_ignore_path in to_ignore_paths
-    ])
+def _is_not_in_ignore_paths(module_path: str,
+                            ignore_prefixes: Tuple[str, ...]) -> bool:
+    """
+    @param module_path: the path of the module to check
+    @param ignore_prefixes: resolved paths to ignore, ending with a separator
+    @return: True if the module path is not inside any of the ignored paths
+    """
+    return not os.path.realpath(module_path).startswith(ignore_prefixes)
 
 
 def infer_imported_code_path(
         path: Union[str, Path],
         root_path: Union[str, Path],
-        to_ignore_paths: Optional[List[str]] = None) -> List[str]:
+        to_ignore_paths: Optional[List[str]] = None,
+        known_modules: Optional[List[str]] = None) -> List[str]:
     """
     known edge cases and limitations:
      - Can result in duplicated copies in code_paths
@@ -81,14 +92,11 @@ def infer_imported_code_path(
     @param to_ignore_paths:  list of paths to ignore.
      - Ignores a directory named *venv* or
      containing *site-packages* by default
+    @param known_modules: optional list of the names of the imported
+     modules, e.g. from a previous run. If set, the imports are not parsed
+     from path, which is faster for large projects.
     @return: list of imported code paths
     """
-    try:
-        from pigar.parser import parse_imports
-    except ImportError as err:
-        raise ImportError('please run "pip install pigar" to use the '
-                          'infer_imported_code_path utility') from err
-
     path = _get_path_as_str(path)
     root_path = _get_path_as_str(root_path)
 
@@ -98,16 +106,24 @@ def infer_imported_code_path(
     if not to_ignore_paths:
         to_ignore_paths = _generate_default_to_ignore_dirs(root_path)
 
-    imported_modules, _ = parse_imports(
-        path,
-        ignores=[f'{to_ignore_path}' for to_ignore_path in to_ignore_paths])
+    if known_modules is not None:
+        imported_modules = [_KnownModule(name) for name in known_modules]
+    else:
+        try:
+            from pigar.parser import parse_imports
+        except ImportError as err:
+            raise ImportError('please run "pip install pigar" to use the '
+                              'infer_imported_code_path utility') from err
+
+        imported_modules, _ = parse_imports(
+            path,
+            ignores=[
+                f'{to_ignore_path}' for to_ignore_path in to_ignore_paths
+            ])
 
     name_to_module = get_name_to_module_path_map(imported_modules, root_path,
                                                  to_ignore_paths)
 
-    code_paths = [
-        _get_code_path(module_name, path)
-        for module_name, path in name_to_module.items()
-        if _get_code_path(module_name, path)
-    ]
-    return list(set(code_paths))
+    code_paths = (_get_code_path(module_name, path)
+                  for module_name, path in name_to_module.items())
+    return list({code_path for code_path in code_paths if code_path})
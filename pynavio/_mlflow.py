@@ -1,18 +1,31 @@
-import copy
+import datetime
+import inspect
 import json
+import math
+import os
+import posixpath
 import shutil
+import signal
+import socket
 import subprocess
+import sys
 import time
+import zipfile
 from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache, partial
+from operator import itemgetter
 from pathlib import Path, PosixPath
 from tempfile import TemporaryDirectory
-from typing import Any, Dict, List, Optional, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
 
 import jsonschema
-import mlflow
+import numpy as np
 import pandas as pd
 import requests
 import yaml
+from requests.adapters import HTTPAdapter
 
 from pynavio.utils import ExampleRequestType, make_env
 from pynavio.utils.json_encoder import JSONEncoder
@@ -20,6 +33,26 @@ from pynavio.utils.schemas import (METADATA_SCHEMA, PREDICTION_SCHEMA,
                                    REQUEST_SCHEMA_SCHEMA,
                                    not_nested_request_schema)
 
+if TYPE_CHECKING:
+    import mlflow
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from yaml import CSafeDumper as _SafeDumper
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeDumper as _SafeDumper
+    from yaml import SafeLoader as _SafeLoader
+
 MODEL_SIZE_LIMIT_IN_BYTES = 1000_000_000
 EXAMPLE_REQUEST = 'example_request'
 ARTIFACTS = 'artifacts'
@@ -31,9 +64,59 @@ pynavio_model_validation = '(pynavio model validation)'
 METADATA = 'metadata'
 OOD_DETECTION = 'oodDetection'
 MLMODEL = 'MLmodel'
+MLMODEL_JSON = 'MLmodel.json'
+MLMODEL_JSON_CACHE_ENV_VAR = 'PYNAVIO_MLMODEL_JSON_CACHE'
+ZIP_COMPRESSIONS = {
+    'stored': zipfile.ZIP_STORED,
+    'deflated': zipfile.ZIP_DEFLATED
+}
 REQUEST_SCHEMA = 'request_schema'
 DATASET = 'dataset'
 EXPLANATIONS = 'explanations'
+SKIP_SERVE_ENV_VAR = 'PYNAVIO_SKIP_SERVE'
+
+
+class _FastValidator:
+    """ Validator compiled with fastjsonschema (if installed), raising
+    jsonschema.exceptions.ValidationError like the jsonschema validators
+    """
+
+    def __init__(self, schema: dict):
+        self._validate = fastjsonschema.compile(schema)
+
+    def validate(self, data) -> None:
+        try:
+            self._validate(data)
+        except fastjsonschema.JsonSchemaException as exc:
+            raise jsonschema.exceptions.ValidationError(exc.message) \
+                from exc
+
+
+_Validator = Union[_FastValidator, jsonschema.Draft7Validator]
+
+
+def _make_validator(schema: dict, fast: bool = True) -> _Validator:
+    """
+    @param schema: the json schema
+    @param fast: if fastjsonschema may be used. Only for data parsed from
+     json or yaml files, as fastjsonschema and jsonschema do not accept the
+     same python values (e.g. numpy scalars and tuples).
+    @return: the compiled validator
+    """
+    jsonschema.Draft7Validator.check_schema(schema)
+    if fast and fastjsonschema is not None:
+        return _FastValidator(schema)
+    return jsonschema.Draft7Validator(schema)
+
+
+# the schemas are constant, so the validators are only built once
+_METADATA_VALIDATOR = _make_validator(METADATA_SCHEMA)
+_PREDICTION_VALIDATOR = _make_validator(PREDICTION_SCHEMA, fast=False)
+_REQUEST_SCHEMA_VALIDATOR = _make_validator(REQUEST_SCHEMA_SCHEMA)
+# a private copy, the public function returns a new schema on every call
+_NOT_NESTED_REQUEST_SCHEMA = not_nested_request_schema()
+_NOT_NESTED_REQUEST_VALIDATOR = _make_validator(_NOT_NESTED_REQUEST_SCHEMA,
+                                                fast=False)
 
 
 def _is_ood_set_to_default_in_metadata(metadata: dict) -> bool:
@@ -58,20 +141,27 @@ def _is_default_explanation_enabled_in_metadata(metadata: dict) -> bool:
            _is_data_provided_in_metadata(metadata)
 
 
-def check_zip_size(model_zip, model_size_in_bytes):
-    if Path(model_zip).stat().st_size > model_size_in_bytes:
-        print(f"Warning: the default model.zip size limit is"
-              f" {model_size_in_bytes} bytes. Please reduce the"
-              f" size or contact craftworks support team to"
-              f" increase the default size")
+# pre-split paths of the MLmodel fields used by pynavio
+_EXAMPLE_REQUEST_ARTIFACT_PATH = ('flavors', 'python_function', 'artifacts',
+                                  'example_request', 'path')
+_DATASET_ARTIFACT_PATH = ('flavors', 'python_function', 'artifacts', 'dataset',
+                          'path')
+_REQUEST_SCHEMA_PATH = ('metadata', 'request_schema', 'path')
+_DATASET_PATH = ('metadata', 'dataset', 'path')
+_EXPLANATION_FORMAT_PATH = ('metadata', 'explanations', 'format')
 
 
-def _get_field(yml: dict, path: str) -> Optional[Any]:
-    keys = path.split('.')
+def _get_field(yml: dict, path: Union[str, Tuple[str, ...]]) -> Optional[Any]:
+    """
+    @param yml: the parsed yaml
+    @param path: a tuple of keys, or a string of keys separated by '.'
+    @return: the value of the field, None if it does not exist
+    """
+    keys = path.split('.') if isinstance(path, str) else path
     assert keys, 'Path must not be empty'
 
-    value = yml.get(keys[0])
-    for key in keys[1:]:
+    value = yml
+    for key in keys:
         if not isinstance(value, dict):
             return None
         value = value.get(key)
@@ -79,6 +169,11 @@ def _get_field(yml: dict, path: str) -> Optional[Any]:
     return value
 
 
+def _write_example_request(example_request: dict, path: str) -> None:
+    with open(path, 'wb') as file:
+        file.write(_dumps_json(example_request, indent=True))
+
+
 def register_example_request(
         tmp_dir,
         example_request: ExampleRequestType = None,
@@ -99,8 +194,7 @@ def register_example_request(
             EXAMPLE_REQUEST: f'{tmp_dir}/{EXAMPLE_REQUEST}.json',
             **(artifacts or {})
         }
-        with open(artifacts[EXAMPLE_REQUEST], 'w') as file:
-            json.dump(example_request, file, indent=4, cls=JSONEncoder)
+        _write_example_request(example_request, artifacts[EXAMPLE_REQUEST])
     else:
         # make sure example_request already exists in the artifacts
         assert EXAMPLE_REQUEST in artifacts, f'if {EXAMPLE_REQUEST} ' \
@@ -112,17 +206,65 @@ def register_example_request(
     return artifacts
 
 
+def _find_pycache_dirs(path: Union[str, Path]) -> Tuple[List[str], List[str]]:
+    """ Finds the __pycache__ directories under the given path,
+    without descending into them
+    @return: the __pycache__ directories and all other walked directories
+    """
+    cache_dirs, walked_dirs = [], []
+    for root, dirs, _ in os.walk(path):
+        walked_dirs.append(root)
+        if '__pycache__' in dirs:
+            cache_dirs.append(os.path.join(root, '__pycache__'))
+            dirs.remove('__pycache__')
+    return cache_dirs, walked_dirs
+
+
+# code path -> mtimes of its directories after __pycache__ was last removed;
+# creating a __pycache__ directory changes the mtime of its parent
+_pycache_cleared: Dict[str, Dict[str, int]] = {}
+
+
+def _is_pycache_cleared(path: str) -> bool:
+    dir_mtimes = _pycache_cleared.get(path)
+    if dir_mtimes is None:
+        return False
+    try:
+        return all(
+            os.stat(directory).st_mtime_ns == mtime_ns
+            for directory, mtime_ns in dir_mtimes.items())
+    except OSError:
+        return False
+
+
 def _safe_code_path(code_path: Union[List[Union[str, PosixPath]], None]):
     if code_path is not None:
-        assert all(Path(p).is_dir() for p in code_path), \
+        resolved_paths = [Path(p).resolve() for p in code_path]
+        assert all(p.is_dir() for p in resolved_paths), \
             'All code dependencies must be directories'
-        assert not any(Path(p).resolve().absolute() == Path.cwd().absolute()
-                       for p in code_path), \
+        assert Path.cwd().resolve() not in resolved_paths, \
             'Code paths must not contain the current directory'
         # deleting __pycache__, otherwise MLFlow adds it to the code directory
-        for path in code_path:
-            for cache_dir in Path(path).glob('**/__pycache__'):
-                shutil.rmtree(cache_dir, ignore_errors=True)
+        walked = {
+            path: _find_pycache_dirs(path)
+            for path in map(str, resolved_paths)
+            if not _is_pycache_cleared(path)
+        }
+        cache_dirs = [
+            cache_dir for path_cache_dirs, _ in walked.values()
+            for cache_dir in path_cache_dirs
+        ]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            executor.map(partial(shutil.rmtree, ignore_errors=True),
+                         cache_dirs)
+        for path, (_, walked_dirs) in walked.items():
+            try:
+                _pycache_cleared[path] = {
+                    directory: os.stat(directory).st_mtime_ns
+                    for directory in walked_dirs
+                }
+            except OSError:
+                _pycache_cleared.pop(path, None)
     else:
         code_path = None
     return code_path
@@ -136,42 +278,85 @@ def _check_data_spec(spec: dict) -> None:
             f'{type(spec[field])}'
 
 
-def _add_metadata(model_path: str,
-                  dataset: Optional[dict] = None,
-                  explanations: Optional[str] = None,
-                  oodd: Optional[str] = None,
-                  num_gpus: Optional[int] = 0) -> None:
-    path = Path(model_path) / 'MLmodel'
-    with path.open('r') as file:
-        cfg = yaml.safe_load(file)
-    example_request_path_yml = 'flavors.python_function.artifacts.' \
-                               'example_request.path'
-    cfg.update(metadata=dict(request_schema=dict(
-        path=_get_field(cfg, example_request_path_yml))))
+def _make_metadata(example_request_path: Optional[str],
+                   dataset: Optional[dict] = None,
+                   dataset_path: Optional[str] = None,
+                   explanations: Optional[str] = None,
+                   oodd: Optional[str] = None,
+                   num_gpus: Optional[int] = 0) -> dict:
+    metadata = dict(request_schema=dict(path=example_request_path))
 
     if dataset is not None:
-        dataset_path_yml = 'flavors.python_function.artifacts.dataset.path'
-        cfg['metadata'].update(dataset=dataset)
-        cfg['metadata']['dataset']['path'] = _get_field(cfg, dataset_path_yml)
+        metadata.update(dataset=dataset)
+        metadata['dataset']['path'] = dataset_path
 
     explanations = explanations or 'default'
     accepted_values = ['disabled', 'default', 'plotly']
     assert explanations in accepted_values, \
         f'explanations config must be one of {accepted_values}'
-    cfg['metadata'].update(explanations=explanations)
+    metadata.update(explanations=explanations)
 
     oodd = oodd or 'default'
     accepted_values = ['disabled', 'default']
     assert oodd in accepted_values, \
         f'oodd config must be one of {accepted_values}'
-    cfg['metadata'].update(oodDetection=oodd)
+    metadata.update(oodDetection=oodd)
 
     assert num_gpus >= 0, 'num_gpus cannot be negative'
     if num_gpus > 0:
-        cfg['metadata'].update(gpus=num_gpus)
+        metadata.update(gpus=num_gpus)
+
+    return metadata
+
 
-    with path.open('w') as file:
-        yaml.dump(cfg, file)
+def _add_metadata(model_path: str,
+                  dataset: Optional[dict] = None,
+                  explanations: Optional[str] = None,
+                  oodd: Optional[str] = None,
+                  num_gpus: Optional[int] = 0) -> None:
+    path = Path(model_path) / MLMODEL
+    # binary mode, so that libyaml decodes the content itself
+    with path.open('rb+') as file:
+        mlmodel = file.read()
+        cfg = yaml.load(mlmodel, Loader=_SafeLoader)
+        example_request_path = _get_field(cfg, _EXAMPLE_REQUEST_ARTIFACT_PATH)
+        dataset_path = _get_field(cfg, _DATASET_ARTIFACT_PATH)
+        metadata = _make_metadata(example_request_path,
+                                  dataset=dataset,
+                                  dataset_path=dataset_path,
+                                  explanations=explanations,
+                                  oodd=oodd,
+                                  num_gpus=num_gpus)
+
+        if METADATA in cfg:
+            cfg[METADATA] = metadata
+            file.seek(0)
+            file.truncate()
+            yaml.dump(cfg, file, Dumper=_SafeDumper, encoding='utf-8')
+        else:
+            # only the metadata block needs to be serialized and appended,
+            # the file position is at its end after reading
+            if not mlmodel.endswith(b'\n'):
+                file.write(b'\n')
+            yaml.dump({METADATA: metadata},
+                      file,
+                      Dumper=_SafeDumper,
+                      encoding='utf-8')
+
+
+def _predict_saved_artifact_paths(artifacts: dict) -> Dict[str, str]:
+    """ Predicts the paths (relative to the model directory) under which
+    mlflow.pyfunc.save_model stores the example request and the dataset
+    @param artifacts: the artifacts passed to mlflow.pyfunc.save_model
+    @return: artifact name to its predicted path
+    """
+    saved_paths = dict()
+    for name in [EXAMPLE_REQUEST, DATASET]:
+        if name in artifacts:
+            file_name = os.path.basename(os.path.normpath(artifacts[name]))
+            # mlflow records the paths in the posix format
+            saved_paths[name] = posixpath.join(ARTIFACTS, file_name)
+    return saved_paths
 
 
 ExampleRequest = Dict[str, List[Dict[str, Any]]]
@@ -183,44 +368,96 @@ def process_path(path):
     return str_path
 
 
+# the parsed files are cached by path and modification time,
+# the returned objects are shared and must not be modified
+
+
+@lru_cache(maxsize=32)
+def _load_yaml_file(path: str, mtime_ns: int) -> Any:
+    with open(path, 'rb') as file:
+        return yaml.load(file, Loader=_SafeLoader)
+
+
+@lru_cache(maxsize=32)
+def _load_json_file(path: str, mtime_ns: int) -> Any:
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+def _clear_file_caches() -> None:
+    _load_yaml_file.cache_clear()
+    _load_json_file.cache_clear()
+
+
+def _is_mlmodel_json_cache_enabled() -> bool:
+    return os.environ.get(MLMODEL_JSON_CACHE_ENV_VAR) == '1'
+
+
+def _write_mlmodel_json(model_path, config: dict) -> None:
+    """ Writes the MLmodel content to a json file next to it,
+    which is faster to load than the yaml file. Skipped if the content
+    would not be read back from json as it is (e.g. dates, int keys).
+    """
+    try:
+        content = json.dumps(config, separators=(',', ':'))
+    except (TypeError, ValueError):
+        return
+    if json.loads(content) != config:
+        return
+    try:
+        (Path(model_path) / MLMODEL_JSON).write_text(content)
+    except OSError:
+        pass  # the cache is optional, e.g. the model dir may be read-only
+
+
 def _read_mlmodel_yaml(model_path):
-    with (Path(model_path) / 'MLmodel').open('r') as config_file:
-        config = yaml.safe_load(config_file)
+    path = Path(model_path) / MLMODEL
+    mtime_ns = path.stat().st_mtime_ns
+    if not _is_mlmodel_json_cache_enabled():
+        return _load_yaml_file(str(path), mtime_ns)
+
+    json_path = Path(model_path) / MLMODEL_JSON
+    if json_path.exists():
+        json_mtime_ns = json_path.stat().st_mtime_ns
+        if json_mtime_ns >= mtime_ns:
+            return _load_json_file(str(json_path), json_mtime_ns)
+
+    config = _load_yaml_file(str(path), mtime_ns)
+    _write_mlmodel_json(model_path, config)
     return config
 
 
 def _read_example_request(model_path, config):
-    schema_path = Path(model_path) / _get_field(
-        config, 'metadata.request_schema.path')
-
-    with open(schema_path, 'r') as schema_file:
-        schema = json.load(schema_file)
-    return schema
+    schema_path = Path(model_path) / _get_field(config, _REQUEST_SCHEMA_PATH)
+    return _load_json_file(str(schema_path), schema_path.stat().st_mtime_ns)
 
 
 def _read_metadata(model_path: str) -> dict:
     yml = _read_mlmodel_yaml(model_path)
 
-    data_path = _get_field(yml, 'metadata.dataset.path')
+    data_path = _get_field(yml, _DATASET_PATH)
     data_path = Path(model_path) / data_path if data_path is not None else None
 
     example_request = _read_example_request(model_path, yml)
 
     return {
-        'dataset': pd.read_csv(data_path) if data_path is not None else None,
-        'explanation_format': _get_field(yml, 'metadata.explanations.format'),
+        'dataset_path': data_path,
+        'explanation_format': _get_field(yml, _EXPLANATION_FORMAT_PATH),
         'example_request': example_request
     }
 
 
+_name_and_sample = itemgetter('name', 'sampleData')
+
+
 def _fetch_data(model_path: str) -> dict:
     meta = _read_metadata(model_path)
     data = meta['example_request']
 
-    _input = {
-        'columns': [x['name'] for x in data['featureColumns']],
-        'data': [[x['sampleData'] for x in data['featureColumns']]]
-    }
+    names, samples = [], []
+    if data['featureColumns']:
+        names, samples = zip(*map(_name_and_sample, data['featureColumns']))
+    _input = {'columns': list(names), 'data': [list(samples)]}
 
     if 'dateTimeColumn' in data:
         _input['columns'].append(data['dateTimeColumn']['name'])
@@ -229,16 +466,22 @@ def _fetch_data(model_path: str) -> dict:
     if meta.get('explanation_format') in ['default', None]:
         return [_input]
 
-    dataset = meta.get('dataset')
-    if dataset is None:
+    dataset_path = meta.get('dataset_path')
+    if dataset_path is None:
         return [_input]
 
-    _explain_input = copy.deepcopy(_input)
-    _explain_input['columns'].append('is_background')
-    _explain_input['data'] = [[
-        *_explain_input['data'][0], False
-    ], *dataset[_input['columns']].assign(is_background=True).sample(
-        20, random_state=42, replace=True).values.tolist()]
+    # the dataset is only read here, as it is not needed otherwise
+    dataset = pd.read_csv(dataset_path, usecols=_input['columns'])
+    # sampling first, so that only the sampled rows are projected
+    sample = dataset.sample(20, random_state=42,
+                            replace=True)[_input['columns']]
+    background = [
+        [*row, True] for row in sample.itertuples(index=False, name=None)
+    ]
+    _explain_input = {
+        'columns': [*_input['columns'], 'is_background'],
+        'data': [[*_input['data'][0], False], *background]
+    }
 
     return [_input, _explain_input]
 
@@ -248,7 +491,11 @@ def _get_example_request_df(model_path):
     return pd.DataFrame(data['data'], columns=data['columns'])
 
 
-def _validate_schema(data, schema, name='', raise_exception=True):
+def _validate_schema(data,
+                     schema,
+                     name='',
+                     raise_exception=True,
+                     validator=None):
     """
     Validate the given data against the specified JSON schema.
 
@@ -260,12 +507,17 @@ def _validate_schema(data, schema, name='', raise_exception=True):
         validation fails. If True (default), the function raises a
         jsonschema ValidationError exception with a
         descriptive error message.
+    @param validator: optional, a precompiled validator for the schema.
+        If not set, the schema is compiled on every call.
     @return: True if the validation passes, False otherwise.
      Only returned if raise_exception is False.
     """
     is_valid = True
     try:
-        jsonschema.validate(data, schema)
+        if validator is not None:
+            validator.validate(data)
+        else:
+            jsonschema.validate(data, schema)
     except jsonschema.exceptions.ValidationError:
         if raise_exception:
             print(f"Error: {pynavio_model_validation} "
@@ -276,12 +528,38 @@ def _validate_schema(data, schema, name='', raise_exception=True):
     return is_valid
 
 
-def is_input_nested(example_request, not_nested_schema):
-    is_not_nested = _validate_schema(example_request,
-                                     not_nested_schema,
-                                     '',
-                                     raise_exception=False)
-    return not is_not_nested
+def _is_column_nested(column: dict) -> bool:
+    return isinstance(column.get('sampleData'),
+                      (dict, list)) or column.get('type') == 'list'
+
+
+def is_input_nested(example_request, not_nested_schema=None, strict=False):
+    """
+    Checks if the example request has nested feature or datetime columns.
+
+    @param example_request: the example request
+    @param not_nested_schema: if set, the example request is validated
+     against this schema, i.e. an otherwise invalid example request also
+     counts as nested
+    @param strict: if True and not_nested_schema is not set, validates
+     against not_nested_request_schema(). If neither is set (default),
+     only the columns' sample data and types are checked.
+    @return: True if the input is nested, False otherwise
+    """
+    if not_nested_schema is not None or strict:
+        validator = None if not_nested_schema is not None \
+            else _NOT_NESTED_REQUEST_VALIDATOR
+        is_not_nested = _validate_schema(example_request,
+                                         not_nested_schema,
+                                         '',
+                                         raise_exception=False,
+                                         validator=validator)
+        return not is_not_nested
+
+    columns = [*example_request.get('featureColumns', [])]
+    if 'dateTimeColumn' in example_request:
+        columns.append(example_request['dateTimeColumn'])
+    return any(_is_column_nested(column) for column in columns)
 
 
 def _is_wrapped_by_prediction_call(func):
@@ -316,12 +594,17 @@ class ModelValidator:
         """
         config = _read_mlmodel_yaml(model_path)
         metadata = config.get('metadata')
-        _validate_schema(metadata, METADATA_SCHEMA, "MLmodel")
+        _validate_schema(metadata,
+                         METADATA_SCHEMA,
+                         "MLmodel",
+                         validator=_METADATA_VALIDATOR)
 
         example_request = _read_example_request(model_path, config)
-        _validate_schema(example_request, REQUEST_SCHEMA_SCHEMA,
-                         "example request")
-        if is_input_nested(example_request, not_nested_request_schema()):
+        _validate_schema(example_request,
+                         REQUEST_SCHEMA_SCHEMA,
+                         "example request",
+                         validator=_REQUEST_SCHEMA_VALIDATOR)
+        if is_input_nested(example_request):
             print('Warning: {pynavio_model_validation} the nested'
                   ' model input is not supported'
                   ' by frontend rendering, it will only be possible'
@@ -336,7 +619,7 @@ class ModelValidator:
                       " are not supported for nested model inputs.")
 
     @staticmethod
-    def run_model_io(model_path, model_input=None, **kwargs):
+    def run_model_io(model_path, model_input=None, model=None, **kwargs):
         """
         Run the given navio mlflow model file with the given input.
 
@@ -344,18 +627,24 @@ class ModelValidator:
         @param model_input: optional, the input data for the model's
         predict method. If None, the example request specified in
         the model metadata will be used as input.
+        @param model: optional, the already loaded model.
+        If None, the model is loaded from model_path.
         @param kwargs: Additional keyword arguments.
 
         @return: The input data and the prediction output.
         """
-        model = mlflow.pyfunc.load_model(model_path)
+        if model is None:
+            import mlflow
+            model = mlflow.pyfunc.load_model(model_path)
         if model_input is None:
             model_input = _get_example_request_df(model_path)
         return model_input, model.predict(model_input)
 
     @staticmethod
-    def _check_if_prediction_call_is_used(model_path):
-        model = mlflow.pyfunc.load_model(model_path)
+    def _check_if_prediction_call_is_used(model_path, model=None):
+        if model is None:
+            import mlflow
+            model = mlflow.pyfunc.load_model(model_path)
         used = True  # do not print warning if not sure
         # try checking the original model's predict function
         try:
@@ -393,7 +682,7 @@ class ModelValidator:
 
         def _validate_prediction_schema(model_prediction):
             try:
-                jsonschema.validate(model_prediction, PREDICTION_SCHEMA)
+                _PREDICTION_VALIDATOR.validate(model_prediction)
             except jsonschema.exceptions.ValidationError:
                 print(f"ERROR: {pynavio_model_validation} The value of "
                       f"model_output['{PREDICTION_KEY}']"
@@ -432,9 +721,17 @@ class ModelValidator:
 
     def _run(self, model_path, model_zip, model_zip_size_limit, **kwargs):
         self.validate_metadata(model_path)
-        model_input, model_output = self.run_model_io(model_path)
-        self._check_if_prediction_call_is_used(model_path)
-        self.verify_model_output(model_output)
+        if kwargs.get('verify_load', True):
+            # the model is loaded once and shared by the checks below
+            import mlflow
+            model = mlflow.pyfunc.load_model(model_path)
+            model_input, model_output = self.run_model_io(model_path,
+                                                          model=model)
+            self._check_if_prediction_call_is_used(model_path, model=model)
+            self.verify_model_output(model_output)
+        else:
+            print(f"{pynavio_model_validation}: Skipping loading and"
+                  f" running the model, as verify_load is set to False")
         self.check_zip_size(model_zip, model_zip_size_limit)
 
     def __call__(self, model_path, model_zip, model_zip_size_limit, **kwargs):
@@ -449,24 +746,189 @@ class ModelValidator:
               f'{kwargs.get("append_to_succeeded_msg", "")}')
 
 
+check_zip_size = ModelValidator.check_zip_size
+
+
+@lru_cache(maxsize=1)
+def _save_model_accepts_metadata() -> bool:
+    import mlflow
+    parameters = inspect.signature(mlflow.pyfunc.save_model).parameters
+    return 'metadata' in parameters
+
+
+@lru_cache(maxsize=1)
 def _is_mlflow2():
     import mlflow
     from packaging import version
     return version.parse(mlflow.__version__) >= version.parse("2.0.0")
 
 
+def _to_mlflow2_value(value):
+    """
+    Converts a value like DataFrame.to_json(orient='records') does,
+    i.e. datetimes to epoch milliseconds and NaN, inf and NaT to null
+    """
+    if isinstance(value, (datetime.datetime, np.datetime64)):
+        value = pd.Timestamp(value)
+        return None if pd.isna(value) else value.value // 10**6
+    if isinstance(value, (float, np.floating)) and not math.isfinite(value):
+        return None
+    return value
+
+
 def _convert_to_mlflow2_format(request_data):
-    dataframe_records = pd.DataFrame.from_records(
-        columns=request_data['columns'],
-        data=request_data['data']).\
-        to_json(orient='records')
-    request_data = {"dataframe_records": json.loads(dataframe_records)}
+    columns = request_data['columns']
+    dataframe_records = [
+        dict(zip(columns, map(_to_mlflow2_value, row)))
+        for row in request_data['data']
+    ]
+    request_data = {"dataframe_records": dataframe_records}
     return request_data
 
 
+def _has_nan(data) -> bool:
+    if isinstance(data, (float, np.floating)):
+        return math.isnan(data) or math.isinf(data)
+    if isinstance(data, np.ndarray):
+        if data.dtype.kind == 'f':
+            return not np.isfinite(data).all()
+        return data.dtype == object and any(map(_has_nan, data.flat))
+    if isinstance(data, Mapping):
+        return any(_has_nan(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(_has_nan(item) for item in data)
+    return False
+
+
+def _dumps_json(data, indent: bool = False) -> bytes:
+    """
+    Serializes data to json, with orjson if it is installed.
+    Values that are not json types are converted by JSONEncoder in both cases,
+    data that orjson cannot write is written with the stdlib json instead.
+    """
+    # orjson would write NaN as null, the stdlib json keeps it as NaN
+    if orjson is not None and not _has_nan(data):
+        option = orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(data,
+                                default=JSONEncoder().default,
+                                option=option)
+        except orjson.JSONEncodeError:
+            # e.g. integers that do not fit into 64 bits
+            pass
+
+    if indent:
+        # the same indentation as with orjson
+        return json.dumps(data, indent=2, cls=JSONEncoder).encode()
+    return json.dumps(data, separators=(',', ':'), cls=JSONEncoder).encode()
+
+
+def _wait_for_model_server(process: subprocess.Popen,
+                           port: int,
+                           timeout: float = 60.) -> None:
+    """ Polls the /ping endpoint of the model server until it responds """
+    url = f'http://127.0.0.1:{port}/ping'
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        assert process.poll() is None, \
+            f'Model server exited with code {process.returncode}'
+        try:
+            requests.get(url, timeout=0.1).raise_for_status()
+            return
+        except requests.exceptions.RequestException:
+            time.sleep(0.1)
+    raise TimeoutError(f'Model server did not start within {timeout}s')
+
+
+def _is_port_in_use(port: int) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        if os.name != 'nt':
+            # connections of a stopped server in TIME_WAIT do not count
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind(('127.0.0.1', port))
+        except OSError:
+            return True
+    return False
+
+
+def _start_model_server(model_path: Union[str, Path],
+                        port: int) -> subprocess.Popen:
+    """ Starts the model server in a new process group, so that it can be
+    stopped together with its workers
+    """
+    args = [
+        'mlflow', 'models', 'serve', '-m',
+        str(model_path), '-p',
+        str(port), '--no-conda'
+    ]
+    if os.name == 'nt':
+        return subprocess.Popen(
+            args, creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
+    return subprocess.Popen(args, start_new_session=True)
+
+
+def _wait_for_process_group(process: subprocess.Popen, timeout: float) -> bool:
+    """ Waits until all processes in the group of process have exited.
+    Returns False if some are still running after timeout seconds
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        process.poll()  # reaps the group leader, it would count otherwise
+        try:
+            os.killpg(process.pid, 0)
+        except ProcessLookupError:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.05)
+
+
+def _stop_model_server(process: subprocess.Popen) -> None:
+    """ Stops the model server together with its workers, so that the
+    port is free again when this returns
+    """
+    if os.name == 'nt':
+        process.send_signal(signal.CTRL_BREAK_EVENT)
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        return
+
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass  # the server has already exited
+    if not _wait_for_process_group(process, timeout=5):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        _wait_for_process_group(process, timeout=5)
+    process.wait()
+
+
+def _predict_in_process(model_path: Union[str, Path],
+                        request_bodies=None,
+                        model=None) -> None:
+    if model is None:
+        import mlflow
+        model = mlflow.pyfunc.load_model(str(model_path))
+    prediction = None
+    for data in (request_bodies or _fetch_data(model_path)):
+        prediction = model.predict(
+            pd.DataFrame(data['data'], columns=data['columns']))
+    print(prediction)
+
+
 def check_model_serving(model_path: Union[str, Path],
                         port=5001,
-                        request_bodies=None):
+                        request_bodies=None,
+                        model=None):
     """
     checks model serving with mlflow. This has limitations, e.g.
     the 'conda.env' setup will not be checked.
@@ -474,35 +936,49 @@ def check_model_serving(model_path: Union[str, Path],
     https://navio.craftworks.io/docs/guides/navio-models/model_creation/#3-test-model-serving
     for testing the model serving.
 
+    If the PYNAVIO_SKIP_SERVE environment variable is set, the model is
+    loaded and run in the current process instead, i.e. the REST
+    interface of the model server is not checked.
+
     @param model_path: model path
     @param port: port to use for model serving, defaults to 5001
     @param request_bodies: request bodies to use
      for checking the model serving, defaults to
      using the example request from the model
+    @param model: optional, the already loaded model to use if the check
+     runs in the current process (see PYNAVIO_SKIP_SERVE above).
+     If None, the model is loaded from model_path.
 
     Will throw an exception if check does not pass.
     """
+    if os.environ.get(SKIP_SERVE_ENV_VAR):
+        _predict_in_process(model_path, request_bodies, model)
+        return
+
     URL = f'http://127.0.0.1:{port}/invocations'
-    process = subprocess.Popen(
-        f'mlflow models serve -m {model_path} -p {port} --no-conda'.split())
-    time.sleep(5)
+    # otherwise the checks could be answered by another server on the port
+    assert not _is_port_in_use(port), f'Port {port} is already in use'
+    process = _start_model_server(model_path, port)
     response = None
+    # a single keep-alive connection is reused for all request bodies
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
 
     try:
+        _wait_for_model_server(process, port)
+        is_mlflow2 = _is_mlflow2()
         for data in (request_bodies or _fetch_data(model_path)):
-            if _is_mlflow2():
+            if is_mlflow2:
                 data = _convert_to_mlflow2_format(data)
-            response = requests.post(
-                URL,
-                data=json.dumps(data, allow_nan=True),
-                headers={'Content-type': 'application/json'})
+            body = _dumps_json(data)
+            response = session.post(
+                URL, data=body, headers={'Content-type': 'application/json'})
             response.raise_for_status()
     finally:
-        process.terminate()
+        session.close()
+        _stop_model_server(process)
         if response is not None:
             print(response.json())
-        subprocess.run('pkill -f gunicorn'.split())
-        time.sleep(2)
 
 
 def _is_valid_sys_dependency_list(sys_dependencies: List[str]) -> bool:
@@ -529,7 +1005,45 @@ def _add_sys_dependencies(path: str, sys_dependencies: List[str]) -> None:
         f.write("\n".join(sys_dependencies))
 
 
-def to_navio(model: mlflow.pyfunc.PythonModel,
+def _make_zip(path: str,
+              compression: str = 'stored',
+              compresslevel: Optional[int] = None) -> Path:
+    """
+    Zips the contents of the given directory to <path>.zip
+
+    @param path: the directory to zip
+    @param compression: one of 'stored' (no compression, suited for
+     already compressed model files) or 'deflated'
+    @param compresslevel: the deflate level (0-9), defaults to 1.
+     Ignored for 'stored' and on python 3.6.
+    @return: path to the .zip file
+    """
+    accepted_values = list(ZIP_COMPRESSIONS)
+    assert compression in accepted_values, \
+        f'zip_compression must be one of {accepted_values}'
+    if compression == 'stored':
+        compresslevel = None
+    elif compresslevel is None:
+        # the lowest level already gives most of the size reduction
+        compresslevel = 1
+
+    zip_kwargs = dict()
+    # zipfile accepts compresslevel from python 3.7 on, 3.6 uses the default
+    if compresslevel is not None and sys.version_info >= (3, 7):
+        zip_kwargs.update(compresslevel=compresslevel)
+    model_zip = Path(path + '.zip')
+    with zipfile.ZipFile(model_zip,
+                         'w',
+                         compression=ZIP_COMPRESSIONS[compression],
+                         **zip_kwargs) as zip_file:
+        for file_path in sorted(Path(path).rglob('*')):
+            arcname = file_path.relative_to(path)
+            if arcname != Path(MLMODEL_JSON):  # pynavio's local cache
+                zip_file.write(file_path, arcname)
+    return model_zip
+
+
+def to_navio(model: 'mlflow.pyfunc.PythonModel',
              path,
              example_request: ExampleRequestType = None,
              pip_packages: List[str] = None,
@@ -543,7 +1057,11 @@ def to_navio(model: mlflow.pyfunc.PythonModel,
              explanations: Optional[str] = None,
              oodd: Optional[str] = None,
              num_gpus: Optional[int] = 0,
-             validate_model: Optional[bool] = True) -> Path:
+             validate_model: Optional[bool] = True,
+             zip_compression: str = 'stored',
+             zip_compresslevel: Optional[int] = None,
+             verify_load: bool = True,
+             scratch_dir: Optional[Union[str, Path]] = None) -> Path:
     """
     create a .zip mlflow model file for navio
     Usage: either pip_packages or conda_env need to be set.
@@ -574,6 +1092,20 @@ def to_navio(model: mlflow.pyfunc.PythonModel,
     @param num_gpus:
     @param validate_model: if the output model should be validated by
      ModelValidator. On by default(True), to disable set to False.
+    @param zip_compression: expected values are ['stored', 'deflated'].
+     If not set, 'stored' is used, i.e. the files are not compressed,
+     as model files are often already compressed.
+    @param zip_compresslevel: the compression level (0-9) used with
+     'deflated' zip_compression. If not set, 1 is used. Ignored on
+     python 3.6.
+    @param verify_load: if the validation should load the saved model and
+     run it on the example request. On by default(True). Setting it to
+     False speeds up saving large models, the metadata and the .zip size
+     are still validated.
+    @param scratch_dir: an existing directory to write the intermediate
+     files (e.g. the example request) to, so that it can be reused across
+     calls. It is created if it does not exist and is not cleaned up.
+     If not set, a temporary directory is used.
 
     Note: Please refer to check_model_serving() method and
     https://navio.craftworks.io/docs/guides/navio-models/model_creation/#3-test-model-serving
@@ -581,6 +1113,8 @@ def to_navio(model: mlflow.pyfunc.PythonModel,
 
     @return: path to the .zip model file
     """
+    import mlflow
+
     path = process_path(path)
 
     if code_path:
@@ -590,9 +1124,8 @@ def to_navio(model: mlflow.pyfunc.PythonModel,
                             "dependencies (or directories containing file "
                             "dependencies)), but is not a list")
 
-        if any(
-                Path(code_p).resolve() in Path(path).resolve().parents
-                for code_p in code_path):
+        path_parents = Path(path).resolve().parents
+        if any(Path(code_p).resolve() in path_parents for code_p in code_path):
             raise ValueError("any of 'code_path' argument paths cannot"
                              " be a parent of 'path' argument,"
                              f" please change the 'path': {path} to be"
@@ -601,7 +1134,13 @@ def to_navio(model: mlflow.pyfunc.PythonModel,
     artifacts = artifacts or dict()
     artifacts = {key: process_path(value) for key, value in artifacts.items()}
 
-    with TemporaryDirectory() as tmp_dir:
+    with ExitStack() as stack:
+        if scratch_dir is None:
+            tmp_dir = stack.enter_context(TemporaryDirectory())
+        else:
+            tmp_dir = str(scratch_dir)
+            os.makedirs(tmp_dir, exist_ok=True)
+
         if dataset is not None:
             _check_data_spec(dataset)
             artifacts.update(dataset=dataset['path'])
@@ -614,21 +1153,38 @@ def to_navio(model: mlflow.pyfunc.PythonModel,
         artifacts = register_example_request(tmp_dir, example_request,
                                              artifacts)
 
+        metadata_kwargs = dict(dataset=dataset,
+                               explanations=explanations,
+                               oodd=oodd,
+                               num_gpus=num_gpus)
+        save_kwargs = dict()
+        saved_paths = None
+        if _save_model_accepts_metadata():
+            # mlflow writes the metadata to MLmodel while saving,
+            # which saves parsing and dumping MLmodel again afterwards
+            saved_paths = _predict_saved_artifact_paths(artifacts)
+            save_kwargs.update(
+                metadata=_make_metadata(saved_paths.get(EXAMPLE_REQUEST),
+                                        dataset_path=saved_paths.get(DATASET),
+                                        **metadata_kwargs))
+
         shutil.rmtree(path, ignore_errors=True)
         mlflow.pyfunc.save_model(path=path,
                                  python_model=model,
                                  conda_env=conda_env,
                                  artifacts=artifacts,
-                                 code_path=code_path)
-
-        _add_metadata(path,
-                      dataset=dataset,
-                      explanations=explanations,
-                      oodd=oodd,
-                      num_gpus=num_gpus)
+                                 code_path=code_path,
+                                 **save_kwargs)
+
+        if saved_paths is None or not all(
+                Path(path, saved_path).exists()
+                for saved_path in saved_paths.values()):
+            # reads the artifact paths from MLmodel
+            _add_metadata(path, **metadata_kwargs)
+        # MLmodel was rewritten, do not rely on the mtime resolution
+        _clear_file_caches()
         _add_sys_dependencies(path, sys_dependencies)
-        shutil.make_archive(path, 'zip', path)
-        model_zip = Path(path + '.zip')
+        model_zip = _make_zip(path, zip_compression, zip_compresslevel)
 
     if validate_model:
         msg_kwargs = {
@@ -644,7 +1200,10 @@ def to_navio(model: mlflow.pyfunc.PythonModel,
                                        ' for testing the model '
                                        'serving.',
         }
-        ModelValidator()(path, model_zip, MODEL_SIZE_LIMIT_IN_BYTES,
+        ModelValidator()(path,
+                         model_zip,
+                         MODEL_SIZE_LIMIT_IN_BYTES,
+                         verify_load=verify_load,
                          **msg_kwargs)
 
     return model_zip
@@ -3,8 +3,18 @@ import os
 import traceback
 from functools import wraps
 
+# the code object shared by the wrappers created by prediction_call, set
+# below; the marker attribute cannot be used to detect them, as
+# functools.wraps copies it to outer decorators
+_WRAPPER_CODE = None
+
 
 def prediction_call(predict_fn: callable) -> callable:
+    if _WRAPPER_CODE is not None and \
+            getattr(predict_fn, '__code__', None) is _WRAPPER_CODE:
+        # already wrapped, another wrapper would only add a call frame
+        return predict_fn
+
     logger = logging.getLogger('gunicorn.error')
 
     @wraps(predict_fn)
@@ -12,17 +22,22 @@ def prediction_call(predict_fn: callable) -> callable:
         try:
             return predict_fn(*args, **kwargs)
         except Exception as exc:
-            logger.exception('Prediction call failed')
+            # formatted once, for both the log and the response
+            stack_trace = traceback.format_exc()
+            logger.error('Prediction call failed\n%s', stack_trace.rstrip())
             return {
-                'error_code': exc.__class__.__name__,
+                'error_code': type(exc).__name__,
                 'message': str(exc),
-                'stack_trace': traceback.format_exc()
+                'stack_trace': stack_trace
             }
 
     wrapper.__wrapped_by_prediction_call__ = True
     return wrapper
 
 
+_WRAPPER_CODE = prediction_call(lambda: None).__code__
+
+
 def assert_gpu_available() -> None:
     """ Helper for ensuring GPU models actually register the GPU
 
@@ -30,10 +30,11 @@ def make_example_request(data: Union[Dict[str, Any], pd.DataFrame],
     }
 
     def _column_spec(name: str, _type: Optional[str] = None) -> Dict[str, Any]:
+        value = row[name]
         return {
             "name": name,
-            "sampleData": row[name],
-            "type": _type or type_names[type(row[name])],
+            "sampleData": value,
+            "type": _type or type_names[type(value)],
             "nullable": False
         }
 
@@ -47,8 +48,8 @@ def make_example_request(data: Union[Dict[str, Any], pd.DataFrame],
         row = data
 
     if feature_columns is None:
-        feature_columns = set(row.keys()) - {target, datetime_column}
-        feature_columns = sorted(list(feature_columns))  # to ease testing
+        # to ease testing
+        feature_columns = sorted(row.keys() - {target, datetime_column})
         assert feature_columns, \
             'Could not infer a valid set of feature columns based on the ' \
             f'data columns: {list(row.keys())}, with target={target} and ' \
@@ -1,4 +1,6 @@
+import fnmatch
 import inspect
+import os
 from pathlib import Path
 from types import ModuleType
 from typing import Any, Dict, List, Optional, Union
@@ -19,13 +21,19 @@ def _get_path_as_str(path_like: Union[str, Path]) -> str:
     return str(path.parent) if path.is_file() else str(path)
 
 
-def _generate_default_to_ignore_dirs(module_path):
-    to_ignore_dirs = [
-        path for path in Path(module_path).rglob("*venv*") if path.is_dir()
-    ]
-    to_ignore_parent_dirs = [
-        path for path in Path(module_path).rglob("*site-packages*")
-        if path.is_dir()
-    ]
-    [to_ignore_dirs.append(path.parent) for path in to_ignore_parent_dirs]
-    return to_ignore_dirs
+def _generate_default_to_ignore_dirs(module_path) -> List[Path]:
+    """ Finds the virtual environment directories and the parents of the
+    site-packages directories under module_path in a single walk.
+    The ignored directories are not descended into, as their contents
+    are ignored with them.
+    """
+    to_ignore_dirs, to_ignore_parent_dirs = [], []
+    for root, dirs, _ in os.walk(module_path):
+        if fnmatch.filter(dirs, '*site-packages*'):
+            to_ignore_parent_dirs.append(Path(root))
+            dirs.clear()
+            continue
+        venv_dirs = fnmatch.filter(dirs, '*venv*')
+        to_ignore_dirs.extend(Path(root, name) for name in venv_dirs)
+        dirs[:] = [name for name in dirs if name not in venv_dirs]
+    return to_ignore_dirs + to_ignore_parent_dirs
@@ -1,7 +1,7 @@
 import platform
 from typing import Any, Dict, List
 
-import pip
+_PYTHON_VERSION = platform.python_version()
 
 
 def make_env(
@@ -25,14 +25,17 @@ def make_env(
         "either 'pip_packages' or 'conda_env' need to be set"
 
     if conda_env is None:
+        import pip
+        channels = ['defaults', 'conda-forge']
+        if conda_channels:
+            channels.extend(conda_channels)
+        dependencies = [f'python={_PYTHON_VERSION}', f'pip={pip.__version__}']
+        if conda_packages:
+            dependencies.extend(conda_packages)
+        dependencies.append({'pip': pip_packages})
         conda_env = {
-            'channels': ['defaults', 'conda-forge', *(conda_channels or [])],
-            'dependencies': [
-                f'python={platform.python_version()}',
-                f'pip={pip.__version__}', *(conda_packages or []), {
-                    'pip': pip_packages
-                }
-            ],
+            'channels': channels,
+            'dependencies': dependencies,
             'name': 'venv'
         }
 
@@ -1,5 +1,6 @@
 import json
 
+import numpy as np
 import pandas as pd
 
 
@@ -8,4 +9,8 @@ class JSONEncoder(json.JSONEncoder):
     def default(self, obj: object):
         if isinstance(obj, pd.Timestamp):
             return str(obj)
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
         return super().default(obj)
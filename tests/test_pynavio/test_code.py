@@ -0,0 +1,47 @@
+import sys
+import types
+from collections import namedtuple
+
+from pynavio._code import get_name_to_module_path_map, infer_imported_code_path
+
+Module = namedtuple('Module', ['name'])
+
+
+def _make_module(monkeypatch, name, path):
+    path.mkdir(parents=True)
+    (path / '__init__.py').write_text('')
+    module = types.ModuleType(name)
+    module.__file__ = str(path / '__init__.py')
+    module.__path__ = [str(path)]
+    monkeypatch.setitem(sys.modules, name, module)
+
+
+def test_get_name_to_module_path_map(monkeypatch, tmp_path):
+    root_path = tmp_path / 'root'
+    ignored_path = root_path / 'venv'
+    _make_module(monkeypatch, 'pkg_kept', root_path / 'pkg_kept')
+    _make_module(monkeypatch, 'pkg_ignored', ignored_path / 'pkg_ignored')
+    _make_module(monkeypatch, 'pkg_outside', tmp_path / 'pkg_outside')
+
+    imported_modules = [
+        Module(name) for name in
+        ['pkg_kept', 'pkg_ignored', 'pkg_outside', 'pkg_not_imported']
+    ]
+    name_to_module_path = get_name_to_module_path_map(imported_modules,
+                                                      str(root_path),
+                                                      [str(ignored_path)])
+
+    assert name_to_module_path == {'pkg_kept': str(root_path / 'pkg_kept')}
+
+
+def test_infer_imported_code_path_with_known_modules(monkeypatch, tmp_path):
+    root_path = tmp_path / 'root'
+    _make_module(monkeypatch, 'pkg_kept', root_path / 'pkg_kept')
+    # the imports must not be parsed with pigar
+    monkeypatch.setitem(sys.modules, 'pigar.parser', None)
+
+    code_paths = infer_imported_code_path(root_path,
+                                          root_path,
+                                          known_modules=['pkg_kept'])
+
+    assert code_paths == [str(root_path / 'pkg_kept')]
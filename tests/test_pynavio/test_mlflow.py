@@ -1,4 +1,9 @@
+import datetime
+import shutil
+
 import jsonschema
+import numpy as np
+import pandas as pd
 import pytest
 
 import pynavio
@@ -88,6 +93,37 @@ def test_prediction_schema_check_positive(model_output):
         pytest.fail("Unexpected Exception")
 
 
+@pytest.mark.parametrize("use_fastjsonschema", [True, False])
+def test_make_validator_raises_validation_error(monkeypatch,
+                                                use_fastjsonschema):
+    if use_fastjsonschema:
+        pytest.importorskip('fastjsonschema')
+    else:
+        monkeypatch.setattr('pynavio.mlflow.fastjsonschema', None)
+
+    validator = pynavio.mlflow._make_validator(
+        pynavio.mlflow.PREDICTION_SCHEMA)
+    validator.validate({PREDICTION_KEY: [1]})
+    with pytest.raises(jsonschema.exceptions.ValidationError):
+        validator.validate({PREDICTION_KEY: [1, "a"]})
+
+    # model outputs are python objects, they need to be accepted the same
+    # way, whether fastjsonschema is installed or not
+    validator = pynavio.mlflow._make_validator(
+        pynavio.mlflow.PREDICTION_SCHEMA, fast=False)
+    validator.validate({PREDICTION_KEY: [np.int64(1)]})
+    validator.validate({PREDICTION_KEY: [np.float32(1.0)]})
+    with pytest.raises(jsonschema.exceptions.ValidationError):
+        validator.validate({PREDICTION_KEY: (1, 2)})
+
+
+def test_prediction_validator_accepts_numpy_scalars():
+    validator = pynavio.mlflow._PREDICTION_VALIDATOR
+    validator.validate({PREDICTION_KEY: [np.int64(1), np.float32(1.0)]})
+    with pytest.raises(jsonschema.exceptions.ValidationError):
+        validator.validate({PREDICTION_KEY: (1, 2)})
+
+
 call_kwargs = {
     'append_to_failed_msg': ' Failed !!!',
     'append_to_succeeded_msg': ' Succeeded !!!'
@@ -132,10 +168,13 @@ def test_ModelValidator_call_negative(monkeypatch, capfd, call_kwargs, msg):
     assert out == expected_msg
 
 
+@pytest.mark.parametrize("pass_schema", [True, False])
+@pytest.mark.parametrize("strict", [True, False])
 @pytest.mark.parametrize("schema_file_name, is_nested",
                          [('example_request_nested.json', True),
                           ('example_request.json', False)])
-def test_is_input_nested(rootpath, schema_file_name, is_nested):
+def test_is_input_nested(rootpath, schema_file_name, is_nested, strict,
+                         pass_schema):
     import json
     schema_path = rootpath / \
         'tests'/'test_pynavio'/'fixtures'/'schemas'/schema_file_name
@@ -143,12 +182,42 @@ def test_is_input_nested(rootpath, schema_file_name, is_nested):
     with open(schema_path, 'r') as schema_file:
         example_request = json.load(schema_file)
 
+    not_nested_schema = pynavio.mlflow.not_nested_request_schema() \
+        if pass_schema else None
     assert pynavio.mlflow.is_input_nested(example_request,
-                                          pynavio.mlflow.
-                                          not_nested_request_schema())\
+                                          not_nested_schema,
+                                          strict=strict)\
            == is_nested
 
 
+def test_not_nested_request_schema_returns_a_copy(rootpath):
+    import json
+    schema = pynavio.mlflow.not_nested_request_schema()
+    schema['required'] = ['nonexistent']
+    assert pynavio.mlflow.not_nested_request_schema() != schema
+
+    schema_path = rootpath / \
+        'tests'/'test_pynavio'/'fixtures'/'schemas'/'example_request.json'
+    with open(schema_path, 'r') as schema_file:
+        example_request = json.load(schema_file)
+    assert pynavio.mlflow.is_input_nested(example_request,
+                                          strict=True) is False
+
+
+def test_is_input_nested_uses_given_schema(rootpath):
+    import json
+    schema_path = rootpath / \
+        'tests'/'test_pynavio'/'fixtures'/'schemas'/'example_request.json'
+
+    with open(schema_path, 'r') as schema_file:
+        example_request = json.load(schema_file)
+
+    assert pynavio.mlflow.is_input_nested(example_request) is False
+    # the structural check is not used when a schema is given
+    assert pynavio.mlflow.is_input_nested(example_request,
+                                          {'required': ['nonexistent']})
+
+
 def test__add_sys_dependencies():
     import os
     dep_path = "."
@@ -186,6 +255,66 @@ def test__is_wrapped_by_prediction_call():
     assert pynavio.mlflow._is_wrapped_by_prediction_call(predict) is False
 
 
+def test_prediction_call_is_idempotent():
+
+    def predict():
+        return {'prediction': [1]}
+
+    wrapped_predict = pynavio.prediction_call(predict)
+    assert pynavio.prediction_call(wrapped_predict) is wrapped_predict
+    assert wrapped_predict() == {'prediction': [1]}
+
+
+def test_prediction_call_wraps_decorated_wrapper():
+    import functools
+
+    def decorator(func):
+
+        @functools.wraps(func)
+        def outer(*args, **kwargs):
+            func(*args, **kwargs)
+            raise ValueError('raised outside of the inner wrapper')
+
+        return outer
+
+    def predict():
+        return {'prediction': [1]}
+
+    wrapped_predict = pynavio.prediction_call(
+        decorator(pynavio.prediction_call(predict)))
+
+    assert wrapped_predict()['error_code'] == 'ValueError'
+
+
+def test_prediction_call_wraps_unhashable_callable():
+
+    class Predict:
+
+        def __eq__(self, other):
+            return isinstance(other, Predict)
+
+        def __call__(self):
+            raise ValueError('bad input')
+
+    wrapped_predict = pynavio.prediction_call(Predict())
+    assert wrapped_predict()['error_code'] == 'ValueError'
+
+
+def test_prediction_call_returns_error(caplog):
+
+    @pynavio.prediction_call
+    def predict():
+        raise ValueError('bad input')
+
+    with caplog.at_level('ERROR', logger='gunicorn.error'):
+        result = predict()
+
+    assert result['error_code'] == 'ValueError'
+    assert result['message'] == 'bad input'
+    assert "raise ValueError('bad input')" in result['stack_trace']
+    assert result['stack_trace'].rstrip() in caplog.text
+
+
 def test_is_model_predict_wrapped_by_prediction_call(tmp_path):
     import mlflow
 
@@ -211,3 +340,609 @@ def test_is_model_predict_wrapped_by_prediction_call(tmp_path):
         )
     except Exception:
         raise pytest.fail(f"did raise {Exception}")
+
+
+def test_wait_for_model_server_fails_if_server_exited():
+    import subprocess
+    import sys
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    with pytest.raises(AssertionError):
+        pynavio.mlflow._wait_for_model_server(process, port=5001)
+
+
+def test_check_model_serving_fails_if_port_in_use(monkeypatch):
+    import socket
+
+    def _start_model_server(model_path, port):
+        raise AssertionError('the model server must not be started')
+
+    monkeypatch.delenv(pynavio.mlflow.SKIP_SERVE_ENV_VAR, raising=False)
+    monkeypatch.setattr(pynavio.mlflow, '_start_model_server',
+                        _start_model_server)
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        sock.listen()
+        port = sock.getsockname()[1]
+        with pytest.raises(AssertionError, match='already in use'):
+            pynavio.mlflow.check_model_serving('path/to/model', port=port)
+
+
+@pytest.mark.skipif(shutil.which('mlflow') is None,
+                    reason='the mlflow cli is not installed')
+def test_check_model_serving_twice_on_same_port(monkeypatch, tmp_path, capsys):
+    import os
+    import socket
+    from pathlib import Path
+    monkeypatch.delenv(pynavio.mlflow.SKIP_SERVE_ENV_VAR, raising=False)
+    # the model server has to import pynavio to unpickle the model
+    root = str(Path(pynavio.__file__).parents[1])
+    monkeypatch.setenv(
+        'PYTHONPATH',
+        os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    example_request = pynavio.make_example_request({'x': 1.0, 'y': 0.0}, 'y')
+    for prediction, other in [(1.5, 2.5), (2.5, 1.5)]:
+        model_path = tmp_path / str(prediction)
+        pynavio.mlflow.to_navio(_make_minimal_model(prediction),
+                                model_path,
+                                example_request=example_request,
+                                pip_packages=['mlflow'],
+                                validate_model=False)
+        pynavio.mlflow.check_model_serving(model_path, port=port)
+        out = capsys.readouterr().out
+        assert str(prediction) in out and str(other) not in out
+
+
+def test_check_model_serving_skip_serve(monkeypatch):
+    calls = []
+    monkeypatch.setenv(pynavio.mlflow.SKIP_SERVE_ENV_VAR, '1')
+    monkeypatch.setattr('pynavio.mlflow._predict_in_process',
+                        lambda *args: calls.append(args))
+    monkeypatch.setattr('subprocess.Popen', None)
+    pynavio.mlflow.check_model_serving('path/to/model')
+    assert calls == [('path/to/model', None, None)]
+
+
+def test_read_mlmodel_yaml_is_cached_until_modified(tmp_path):
+    import os
+    mlmodel = tmp_path / 'MLmodel'
+    mlmodel.write_text('a: 1\n')
+    config = pynavio.mlflow._read_mlmodel_yaml(tmp_path)
+    assert config == {'a': 1}
+    assert pynavio.mlflow._read_mlmodel_yaml(tmp_path) is config
+
+    mlmodel.write_text('a: 2\n')
+    stat = mlmodel.stat()
+    os.utime(mlmodel, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert pynavio.mlflow._read_mlmodel_yaml(tmp_path) == {'a': 2}
+
+
+def test_read_mlmodel_yaml_json_cache(monkeypatch, tmp_path):
+    monkeypatch.setenv(pynavio.mlflow.MLMODEL_JSON_CACHE_ENV_VAR, '1')
+    (tmp_path / 'MLmodel').write_text('a:\n  b: 1\n')
+    assert pynavio.mlflow._read_mlmodel_yaml(tmp_path) == {'a': {'b': 1}}
+
+    json_path = tmp_path / pynavio.mlflow.MLMODEL_JSON
+    assert json_path.exists()
+    json_path.write_text('{"a": {"b": 2}}')
+    assert pynavio.mlflow._read_mlmodel_yaml(tmp_path) == {'a': {'b': 2}}
+
+
+@pytest.mark.parametrize("config", [{
+    'a': datetime.date(2022, 1, 1)
+}, {
+    'a': {
+        1: 'b'
+    }
+}])
+def test_write_mlmodel_json_skips_changed_values(tmp_path, config):
+    pynavio.mlflow._write_mlmodel_json(tmp_path, config)
+    assert not (tmp_path / pynavio.mlflow.MLMODEL_JSON).exists()
+
+
+def _make_explainable_model_dir(path):
+    import json
+
+    import pandas as pd
+    (path / 'MLmodel').write_text('metadata:\n'
+                                  '  request_schema:\n'
+                                  '    path: example_request.json\n'
+                                  '  dataset:\n'
+                                  '    path: data.csv\n'
+                                  '  explanations:\n'
+                                  '    format: plotly\n')
+    example_request = {
+        'featureColumns': [{
+            'name': name,
+            'sampleData': value,
+            'type': 'float',
+            'nullable': False
+        } for name, value in [('x', 1.), ('y', 2.)]],
+        'targetColumns': [{
+            'name': 'target',
+            'sampleData': 3.,
+            'type': 'float',
+            'nullable': False
+        }]
+    }
+    (path / 'example_request.json').write_text(json.dumps(example_request))
+    pd.DataFrame({
+        'target': range(5),
+        'y': [float(i) for i in range(10, 15)],
+        'x': range(5)
+    }).to_csv(path / 'data.csv', index=False)
+
+
+def test_fetch_data_with_explanations(tmp_path):
+    _make_explainable_model_dir(tmp_path)
+    _input, _explain_input = pynavio.mlflow._fetch_data(str(tmp_path))
+
+    assert _input == {'columns': ['x', 'y'], 'data': [[1., 2.]]}
+    assert _explain_input['columns'] == ['x', 'y', 'is_background']
+    assert _explain_input['data'][0] == [1., 2., False]
+    assert len(_explain_input['data']) == 21
+    assert all(row[2] is True and row[1] == row[0] + 10
+               for row in _explain_input['data'][1:])
+    assert all(
+        type(row[0]) is int and type(row[1]) is float
+        for row in _explain_input['data'][1:])
+
+
+def test_fetch_data_without_feature_columns(tmp_path):
+    import json
+    (tmp_path / 'MLmodel').write_text('metadata:\n'
+                                      '  request_schema:\n'
+                                      '    path: example_request.json\n')
+    example_request = {
+        'featureColumns': [],
+        'dateTimeColumn': {
+            'name': 't',
+            'sampleData': '2021-01-01 10:00:00'
+        }
+    }
+    with open(tmp_path / 'example_request.json', 'w') as file:
+        json.dump(example_request, file)
+
+    assert pynavio.mlflow._fetch_data(str(tmp_path)) == [{
+        'columns': ['t'],
+        'data': [['2021-01-01 10:00:00']]
+    }]
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+@pytest.mark.parametrize("data, mlflow2, expected", [
+    ({
+        'columns': ['x', 'y'],
+        'data': [[1, 'a'], [2.5, 'b']]
+    }, False, {
+        'columns': ['x', 'y'],
+        'data': [[1, 'a'], [2.5, 'b']]
+    }),
+    ({
+        'columns': ['x'],
+        'data': [[float('nan')]]
+    }, False, {
+        'columns': ['x'],
+        'data': [[float('nan')]]
+    }),
+    ({
+        'columns': ['x', 'y'],
+        'data': [[np.int64(1), np.float32(0.1)]]
+    }, False, {
+        'columns': ['x', 'y'],
+        'data': [[1, float(np.float32(0.1))]]
+    }),
+    ({
+        'columns': ['t', 'x'],
+        'data': [[pd.Timestamp('2021-01-01 10:00:00'),
+                  float('nan')], [pd.NaT, np.float64('inf')]]
+    }, True, {
+        'dataframe_records': [{
+            't': 1609495200000,
+            'x': None
+        }, {
+            't': None,
+            'x': None
+        }]
+    }),
+])
+def test_serialize_request_body(monkeypatch, use_orjson, data, mlflow2,
+                                expected):
+    import json
+    if use_orjson:
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr('pynavio.mlflow.orjson', None)
+
+    if mlflow2:
+        data = pynavio.mlflow._convert_to_mlflow2_format(data)
+    body = pynavio.mlflow._dumps_json(data)
+    assert isinstance(body, bytes)
+    assert json.dumps(json.loads(body)) == json.dumps(expected)
+
+
+def test_convert_to_mlflow2_format():
+    request_data = {'columns': ['x', 'y'], 'data': [[1, 'a'], [2.5, 'b']]}
+    assert pynavio.mlflow._convert_to_mlflow2_format(request_data) == {
+        'dataframe_records': [{
+            'x': 1,
+            'y': 'a'
+        }, {
+            'x': 2.5,
+            'y': 'b'
+        }]
+    }
+
+
+@pytest.mark.parametrize("compression, compresslevel", [('stored', None),
+                                                        ('deflated', None),
+                                                        ('deflated', 9)])
+def test_make_zip(tmp_path, compression, compresslevel):
+    import zipfile
+    model_path = tmp_path / 'model'
+    (model_path / 'artifacts').mkdir(parents=True)
+    (model_path / 'MLmodel').write_text('a: 1\n')
+    (model_path / 'artifacts' / 'data.csv').write_text('x\n1\n')
+
+    model_zip = pynavio.mlflow._make_zip(str(model_path), compression,
+                                         compresslevel)
+
+    assert model_zip == tmp_path / 'model.zip'
+    with zipfile.ZipFile(model_zip) as zip_file:
+        assert sorted(zip_file.namelist()) == [
+            'MLmodel', 'artifacts/', 'artifacts/data.csv'
+        ]
+        assert zip_file.read('artifacts/data.csv') == b'x\n1\n'
+        assert all(
+            info.compress_type == pynavio.mlflow.ZIP_COMPRESSIONS[compression]
+            for info in zip_file.infolist()
+            if not info.is_dir())
+
+
+def test_predict_saved_artifact_paths():
+    artifacts = {
+        pynavio.mlflow.EXAMPLE_REQUEST: '/tmp/example_request.json',
+        'dataset': '/data/train/',
+        'other': '/tmp/other.bin'
+    }
+    assert pynavio.mlflow._predict_saved_artifact_paths(artifacts) == {
+        pynavio.mlflow.EXAMPLE_REQUEST: 'artifacts/example_request.json',
+        'dataset': 'artifacts/train'
+    }
+
+
+def _make_minimal_model(prediction=1.0):
+    import mlflow
+
+    class Minimal(mlflow.pyfunc.PythonModel):
+
+        @pynavio.prediction_call
+        def predict(self, context, model_input):
+            return {PREDICTION_KEY: [prediction] * len(model_input)}
+
+    return Minimal()
+
+
+@pytest.mark.parametrize("accepts_metadata", [True, False])
+def test_to_navio_writes_metadata(monkeypatch, tmp_path, accepts_metadata):
+    import yaml
+    if accepts_metadata:
+        if not pynavio.mlflow._save_model_accepts_metadata():
+            pytest.skip('mlflow.pyfunc.save_model has no metadata argument')
+
+        def _add_metadata(*args, **kwargs):
+            raise AssertionError('MLmodel must not be rewritten')
+
+        monkeypatch.setattr(pynavio.mlflow, '_add_metadata', _add_metadata)
+    else:
+        monkeypatch.setattr(pynavio.mlflow, '_save_model_accepts_metadata',
+                            lambda: False)
+
+    data = pd.DataFrame(dict(x=[1.0, 2.0], y=[0.0, 1.0]))
+    data_path = tmp_path / 'data.csv'
+    data.to_csv(data_path, index=False)
+    example_request = pynavio.make_example_request(data, 'y')
+    model_path = tmp_path / 'model'
+    pynavio.mlflow.to_navio(_make_minimal_model(),
+                            model_path,
+                            example_request=example_request,
+                            pip_packages=['mlflow'],
+                            dataset=dict(name='data', path=str(data_path)),
+                            explanations='plotly',
+                            validate_model=False)
+
+    with open(model_path / pynavio.mlflow.MLMODEL) as file:
+        metadata = yaml.safe_load(file)[pynavio.mlflow.METADATA]
+    assert metadata == {
+        'dataset': {
+            'name': 'data',
+            'path': 'artifacts/data.csv'
+        },
+        'explanations': 'plotly',
+        'oodDetection': 'default',
+        'request_schema': {
+            'path': 'artifacts/example_request.json'
+        }
+    }
+    pynavio.mlflow.ModelValidator.validate_metadata(str(model_path))
+
+
+def test_to_navio_reuses_scratch_dir(tmp_path):
+    example_request = pynavio.make_example_request({'x': 1.0, 'y': 0.0}, 'y')
+    scratch_dir = tmp_path / 'scratch' / 'nested'
+
+    def _to_navio(name):
+        pynavio.mlflow.to_navio(_make_minimal_model(),
+                                tmp_path / name,
+                                example_request=example_request,
+                                pip_packages=['mlflow'],
+                                validate_model=False,
+                                scratch_dir=scratch_dir)
+        assert (tmp_path / name / 'artifacts' /
+                'example_request.json').exists()
+
+    _to_navio('model_a')
+    # created if missing and not deleted after the call
+    assert (scratch_dir / 'example_request.json').exists()
+    (scratch_dir / 'other.txt').write_text('kept')
+
+    _to_navio('model_b')
+    assert (scratch_dir / 'example_request.json').exists()
+    assert (scratch_dir / 'other.txt').read_text() == 'kept'
+
+
+def test_make_zip_keeps_order_and_content(tmp_path):
+    import zipfile
+    model_path = tmp_path / 'model'
+    model_path.mkdir()
+    names = [f'file_{i:02d}.txt' for i in range(10)]
+    for name in names:
+        (model_path / name).write_text(name * 100)
+
+    model_zip = pynavio.mlflow._make_zip(str(model_path), 'deflated')
+
+    with zipfile.ZipFile(model_zip) as zip_file:
+        assert zip_file.namelist() == names
+        assert all(
+            zip_file.read(name) == (name * 100).encode() for name in names)
+
+
+@pytest.mark.parametrize("compression", ['stored', 'deflated'])
+def test_make_zip_on_python36(monkeypatch, tmp_path, compression):
+    import zipfile
+    zip_file_cls = zipfile.ZipFile
+
+    def _zip_file(*args, compression=zipfile.ZIP_STORED):
+        # python 3.6 zipfile.ZipFile has no compresslevel argument
+        return zip_file_cls(*args, compression=compression)
+
+    monkeypatch.setattr(pynavio.mlflow.sys, 'version_info', (3, 6, 15))
+    monkeypatch.setattr(pynavio.mlflow.zipfile, 'ZipFile', _zip_file)
+    model_path = tmp_path / 'model'
+    model_path.mkdir()
+    (model_path / 'MLmodel').write_text('a: 1\n')
+
+    model_zip = pynavio.mlflow._make_zip(str(model_path), compression)
+
+    with zip_file_cls(model_zip) as zip_file:
+        assert zip_file.read('MLmodel') == b'a: 1\n'
+
+
+def test_make_zip_excludes_mlmodel_json(tmp_path):
+    import zipfile
+    model_path = tmp_path / 'model'
+    model_path.mkdir()
+    (model_path / 'MLmodel').write_text('a: 1\n')
+    (model_path / pynavio.mlflow.MLMODEL_JSON).write_text('{"a": 1}')
+
+    model_zip = pynavio.mlflow._make_zip(str(model_path))
+
+    with zipfile.ZipFile(model_zip) as zip_file:
+        assert zip_file.namelist() == ['MLmodel']
+
+
+def test_make_zip_fails_on_unknown_compression(tmp_path):
+    with pytest.raises(AssertionError):
+        pynavio.mlflow._make_zip(str(tmp_path), 'bzip2')
+
+
+def test_safe_code_path_removes_pycache(tmp_path):
+    code_path = tmp_path / 'code'
+    for cache_dir in ['__pycache__', 'package/__pycache__']:
+        (code_path / cache_dir).mkdir(parents=True)
+        (code_path / cache_dir / 'module.cpython.pyc').write_bytes(b'')
+    (code_path / 'package' / 'module.py').write_text('')
+
+    assert pynavio.mlflow._safe_code_path([code_path]) == [code_path]
+    assert not any(code_path.rglob('__pycache__'))
+    assert (code_path / 'package' / 'module.py').exists()
+
+
+def test_safe_code_path_skips_unchanged_paths(monkeypatch, tmp_path):
+    code_path = tmp_path / 'code'
+    (code_path / 'package').mkdir(parents=True)
+    find_pycache_dirs = pynavio.mlflow._find_pycache_dirs
+    walked = []
+
+    def _find_pycache_dirs(path):
+        walked.append(path)
+        return find_pycache_dirs(path)
+
+    monkeypatch.setattr(pynavio.mlflow, '_find_pycache_dirs',
+                        _find_pycache_dirs)
+
+    pynavio.mlflow._safe_code_path([code_path])
+    pynavio.mlflow._safe_code_path([code_path])
+    assert len(walked) == 1
+
+    (code_path / 'package' / '__pycache__').mkdir()
+    pynavio.mlflow._safe_code_path([code_path])
+    assert len(walked) == 2
+    assert not any(code_path.rglob('__pycache__'))
+
+
+def test_safe_code_path_fails_on_cwd(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(AssertionError):
+        pynavio.mlflow._safe_code_path(['.'])
+
+
+@pytest.mark.parametrize("path, expected", [
+    ('a.b', 1),
+    (('a', 'b'), 1),
+    (('a',), {
+        'b': 1
+    }),
+    (('a', 'b', 'c'), None),
+    (('a', 'x'), None),
+    (('x', 'b'), None),
+])
+def test_get_field(path, expected):
+    assert pynavio.mlflow._get_field({'a': {'b': 1}}, path) == expected
+
+
+MLMODEL_FIXTURE = '''flavors:
+  python_function:
+    artifacts:
+      dataset:
+        path: artifacts/data.csv
+        uri: /tmp/data.csv
+      example_request:
+        path: artifacts/example_request.json
+        uri: /tmp/example_request.json
+    loader_module: mlflow.pyfunc.model
+python_version: 3.8.10
+'''
+
+
+@pytest.mark.parametrize("existing_metadata", ['', 'metadata:\n  old: 1\n'])
+def test_add_metadata(tmp_path, existing_metadata):
+    import yaml
+    (tmp_path / 'MLmodel').write_text(MLMODEL_FIXTURE + existing_metadata)
+
+    pynavio.mlflow._add_metadata(str(tmp_path),
+                                 dataset={
+                                     'name': 'data',
+                                     'path': '/tmp/data.csv'
+                                 },
+                                 explanations='plotly',
+                                 num_gpus=1)
+
+    with (tmp_path / 'MLmodel').open() as file:
+        cfg = yaml.safe_load(file)
+    assert cfg == {
+        **yaml.safe_load(MLMODEL_FIXTURE), 'metadata': {
+            'request_schema': {
+                'path': 'artifacts/example_request.json'
+            },
+            'dataset': {
+                'name': 'data',
+                'path': 'artifacts/data.csv'
+            },
+            'explanations': 'plotly',
+            'oodDetection': 'default',
+            'gpus': 1
+        }
+    }
+
+
+@pytest.mark.parametrize("verify_load", [True, False])
+def test_ModelValidator_run_loads_model_once(monkeypatch, verify_load):
+    loaded = []
+
+    class Model:
+
+        def predict(self, model_input):
+            return {'prediction': [1]}
+
+    def load_model(model_path):
+        loaded.append(model_path)
+        return Model()
+
+    monkeypatch.setattr('mlflow.pyfunc.load_model', load_model)
+    monkeypatch.setattr('pynavio.mlflow.ModelValidator.validate_metadata',
+                        staticmethod(lambda model_path: None))
+    monkeypatch.setattr(
+        'pynavio.mlflow.ModelValidator.check_zip_size',
+        staticmethod(lambda model_zip, model_size_in_bytes: None))
+    monkeypatch.setattr('pynavio.mlflow._get_example_request_df',
+                        lambda model_path: None)
+
+    pynavio.mlflow.ModelValidator()._run('path/to/model',
+                                         '',
+                                         0,
+                                         verify_load=verify_load)
+    assert loaded == (['path/to/model'] if verify_load else [])
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+@pytest.mark.parametrize("sample_data, expected", [
+    (1.5, 1.5),
+    (pd.Timestamp('2021-01-01 10:00:00'), '2021-01-01 10:00:00'),
+    (np.int64(1), 1),
+    (np.float32(1.5), 1.5),
+    (np.float32(0.1), float(np.float32(0.1))),
+    (np.array([1., 2.]), [1., 2.]),
+    (2**70, 2**70),
+])
+def test_register_example_request_writes_json(monkeypatch, tmp_path,
+                                              use_orjson, sample_data,
+                                              expected):
+    import json
+    if use_orjson:
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr('pynavio.mlflow.orjson', None)
+
+    example_request = {
+        'featureColumns': [{
+            'name': 'x',
+            'sampleData': sample_data
+        }],
+        'targetColumns': [{
+            'name': 'y',
+            'sampleData': float('nan')
+        }]
+    }
+    for target in [float('nan'), 1.]:
+        example_request['targetColumns'][0]['sampleData'] = target
+        artifacts = pynavio.mlflow.register_example_request(
+            tmp_path, example_request)
+        with open(artifacts[pynavio.mlflow.EXAMPLE_REQUEST]) as file:
+            written = json.load(file)
+        assert written['featureColumns'][0]['sampleData'] == expected
+        assert json.dumps(written['targetColumns']) == json.dumps(
+            example_request['targetColumns'])
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+@pytest.mark.parametrize("sample_data", [
+    np.float32('nan'),
+    np.array([1., np.nan]),
+    np.array([1., np.inf]),
+    np.array([1., float('nan')], dtype=object),
+])
+def test_write_example_request_keeps_numpy_nan(monkeypatch, tmp_path,
+                                               use_orjson, sample_data):
+    if use_orjson:
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr('pynavio.mlflow.orjson', None)
+
+    path = tmp_path / 'example_request.json'
+    pynavio.mlflow._write_example_request({'sampleData': sample_data}, path)
+
+    content = path.read_text()
+    assert 'null' not in content
+    assert content.startswith('{\n  "sampleData"')
+
+
+def test_import_does_not_load_mlflow():
+    import subprocess
+    import sys
+    code = 'import sys, pynavio; assert "mlflow" not in sys.modules'
+    subprocess.run([sys.executable, '-c', code], check=True)
@@ -0,0 +1,17 @@
+from pynavio.utils.common import _generate_default_to_ignore_dirs
+
+
+def test_generate_default_to_ignore_dirs(tmp_path):
+    for path in [
+            'venv/lib/python3.8/site-packages/package', 'project/.venv',
+            'project/module', 'env/lib/site-packages'
+    ]:
+        (tmp_path / path).mkdir(parents=True)
+    (tmp_path / 'project' / 'pyvenv.cfg').write_text('')
+
+    to_ignore_dirs = _generate_default_to_ignore_dirs(tmp_path)
+
+    assert sorted(to_ignore_dirs) == sorted([
+        tmp_path / 'venv', tmp_path / 'project' / '.venv',
+        tmp_path / 'env' / 'lib'
+    ])
@@ -62,6 +62,19 @@ def test_make_conda_env_positive_yaml(args, expected=yaml_path):
         ],
         'name': 'venv'
     }),
+    ({
+        'pip_packages': ['mlflow'],
+        'conda_packages': ['cudatoolkit']
+    }, {
+        'channels': ['defaults', 'conda-forge'],
+        'dependencies': [
+            f'python={platform.python_version()}', f'pip={pip.__version__}',
+            'cudatoolkit', {
+                'pip': ['mlflow']
+            }
+        ],
+        'name': 'venv'
+    }),
 ])
 def test_make_conda_env_positive(args, expected):
     conda_env = make_env(**args)